@@ -0,0 +1,48 @@
+"""Benchmark green-claim detection: lower() + substring scans vs a case-insensitive regex alternation."""
+
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.greenwashing_verifier import GREEN_TERMS  # noqa: E402
+
+FILLER = (
+    "the issuer reported revenue growth across regional operations during the fiscal period "
+    "with stable margins lower leverage and improved liquidity"
+).split()
+
+
+def make_chunks(n_chunks: int = 200, n_words: int = 150, seed: int = 0):
+    rng = random.Random(seed)
+    misses = [" ".join(rng.choice(FILLER) for _ in range(n_words)) for _ in range(n_chunks)]
+    hits = [text[: len(text) // 2] + " Solar " + text[len(text) // 2 :] for text in misses]
+    return misses, hits
+
+
+def scan_substrings(texts):
+    found = 0
+    for text in texts:
+        text_lower = text.lower()
+        if any(term in text_lower for term in GREEN_TERMS):
+            found += 1
+    return found
+
+
+def scan_regex(texts, pattern=re.compile("|".join(map(re.escape, GREEN_TERMS)), re.IGNORECASE)):
+    return sum(1 for text in texts if pattern.search(text))
+
+
+def main():
+    misses, hits = make_chunks()
+    for name, fn in [("lower + substring", scan_substrings), ("regex alternation", scan_regex)]:
+        for label, texts in [("no match", misses), ("match", hits)]:
+            seconds = min(timeit.repeat(lambda: fn(texts), number=10, repeat=5)) / 10
+            print(f"{name:18} {label:9} {seconds * 1000:7.2f} ms per {len(texts)} chunks")
+
+
+if __name__ == "__main__":
+    main()
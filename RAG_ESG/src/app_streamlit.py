@@ -1,28 +1,71 @@
+import hashlib
 import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
 import streamlit as st
 from langchain.schema import Document
-from langchain.vectorstores import FAISS
 from langchain.prompts import ChatPromptTemplate
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from langchain_nvidia_ai_endpoints import ChatNVIDIA, NVIDIAEmbeddings
 
-# Optional but strongly recommended for real PDF text extraction
-# pip install pymupdf
-import fitz  # PyMuPDF
+# `streamlit run src/app_streamlit.py` only puts src/ on sys.path; expose the package root too.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.core.config import load_config  # noqa: E402
+from src.core.embed_cache import EMBED_CACHE_FILE, EmbeddingCache  # noqa: E402
+from src.db.vector_store import create_faiss_store  # noqa: E402
+from src.models.embedding import CachedEmbeddings, embed_in_batches  # noqa: E402
+from src.processors.document import dedupe_documents  # noqa: E402
+from src.processors.pdf import PdfSource, load_pdf_pages  # noqa: E402  (requires pymupdf)
+from src.processors.splitter import split_text  # noqa: E402
+
+EMBEDDING_MODEL = "nvidia/nv-embed-v1"
+LLM_MODEL = "mistralai/mixtral-8x7b-instruct-v0.1"
+EMBED_BATCH_SIZE = 64
 
 
 # ----------------------------
 # Helpers
 # ----------------------------
+
+
 def load_embeddings():
     # Requires NVIDIA_API_KEY in env (or set from UI below)
-    return NVIDIAEmbeddings(model="nvidia/nv-embed-v1")
+    # Cached on disk so rebuilding the index only embeds chunks not seen before.
+    return CachedEmbeddings(
+        NVIDIAEmbeddings(model=EMBEDDING_MODEL),
+        EmbeddingCache(load_config().cache_dir / EMBED_CACHE_FILE),
+        model=EMBEDDING_MODEL,
+    )
+
+
+def api_key_digest(api_key: str) -> str:
+    # Cached resources are keyed by this digest so the raw key never ends up in a cache key.
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+# Clients persist across script reruns (one per API key) instead of being rebuilt on every widget interaction.
+# Arguments prefixed with "_" are excluded from Streamlit's cache key.
+@st.cache_resource(show_spinner=False)
+def get_embeddings(key_digest: str, _api_key: str):
+    os.environ["NVIDIA_API_KEY"] = _api_key
+    return load_embeddings()
 
 
-def build_vector_store(docs):
-    embeddings = load_embeddings()
-    return FAISS.from_documents(docs, embeddings)
+@st.cache_resource(show_spinner=False)
+def get_llm(key_digest: str, _api_key: str):
+    os.environ["NVIDIA_API_KEY"] = _api_key
+    return ChatNVIDIA(model=LLM_MODEL)
+
+
+def build_vector_store(docs, embeddings):
+    # Embed explicitly in large batches rather than letting FAISS.from_documents drive the requests.
+    vectors = embed_in_batches(embeddings, [d.page_content for d in docs], batch_size=EMBED_BATCH_SIZE)
+    # Same tiered (flat / SQ8 / IVF-PQ) index as the desktop app's VectorStore.
+    return create_faiss_store(docs, vectors, embeddings, load_config().faiss)
 
 
 def format_sources(retrieved_docs, max_chars=1200):
@@ -70,36 +113,24 @@ def answer_question(llm, question, retrieved_docs):
 
 
 def extract_pdf_to_chunked_docs(
-    pdf_bytes: bytes,
+    pdf_source: PdfSource,
     source_name: str,
     chunk_size: int = 1200,
     chunk_overlap: int = 150,
 ):
     """
     Extract real text from PDF (per page) and split into chunks to avoid embedding token limits.
+    pdf_source is a file path (preferred: PyMuPDF reads it without a second in-memory copy) or raw bytes.
     Returns a list[Document] with metadata: source, page, chunk.
     """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", ". ", " ", ""],
-    )
-
     docs: list[Document] = []
-    pdf = fitz.open(stream=pdf_bytes, filetype="pdf")
-
-    for pno in range(len(pdf)):
-        text = pdf[pno].get_text("text") or ""
-        text = text.strip()
-        if not text:
-            continue
-
-        chunks = splitter.split_text(text)
+    for page in load_pdf_pages(pdf_source, source_name):
+        chunks = split_text(page.page_content, chunk_size, chunk_overlap)
         for ci, chunk in enumerate(chunks):
             docs.append(
                 Document(
                     page_content=chunk,
-                    metadata={"source": source_name, "page": pno + 1, "chunk": ci},
+                    metadata={**page.metadata, "chunk": ci},
                 )
             )
 
@@ -160,15 +191,22 @@ def main():
         progress = st.progress(0, text="Extracting + chunking PDFs...")
 
         for i, file in enumerate(uploaded_files, start=1):
-            pdf_bytes = file.read()
-
-            # REAL extraction + chunking (safe for large PDFs)
-            chunked_docs = extract_pdf_to_chunked_docs(
-                pdf_bytes=pdf_bytes,
-                source_name=file.name,
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap,
-            )
+            # Stream the upload to a temp file instead of .read()-ing a second full copy into memory.
+            file.seek(0)
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+                shutil.copyfileobj(file, tmp)
+                tmp_path = tmp.name
+
+            try:
+                # REAL extraction + chunking (safe for large PDFs)
+                chunked_docs = extract_pdf_to_chunked_docs(
+                    pdf_source=tmp_path,
+                    source_name=file.name,
+                    chunk_size=chunk_size,
+                    chunk_overlap=chunk_overlap,
+                )
+            finally:
+                os.unlink(tmp_path)
             all_docs.extend(chunked_docs)
 
             progress.progress(i / len(uploaded_files), text=f"Processed: {file.name}")
@@ -179,11 +217,16 @@ def main():
             st.error("No extractable text found in uploaded PDFs.")
             st.stop()
 
-        st.session_state.docs = all_docs
-        st.session_state.vs = build_vector_store(all_docs)
+        # Overlapping reports often repeat boilerplate verbatim; embed each distinct chunk once.
+        unique_docs = dedupe_documents(all_docs)
+
+        st.session_state.docs = unique_docs
+        embeddings = get_embeddings(api_key_digest(nvidia_key), nvidia_key)
+        st.session_state.vs = build_vector_store(unique_docs, embeddings)
 
         st.success(
-            f"Indexed {len(all_docs)} chunks from {len(uploaded_files)} PDF(s). You can now chat below."
+            f"Indexed {len(unique_docs)} chunks ({len(all_docs) - len(unique_docs)} duplicates skipped) "
+            f"from {len(uploaded_files)} PDF(s). You can now chat below."
         )
 
     # Show chat history
@@ -205,7 +248,7 @@ def main():
 
     os.environ["NVIDIA_API_KEY"] = nvidia_key
 
-    llm = ChatNVIDIA(model="mistralai/mixtral-8x7b-instruct-v0.1")
+    llm = get_llm(api_key_digest(nvidia_key), nvidia_key)
 
     user_q = st.chat_input("Ask about allocations, impact KPIs, eligibility, reporting gaps...")
     if user_q:
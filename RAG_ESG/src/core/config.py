@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import os
 from dataclasses import dataclass, field
@@ -18,11 +19,25 @@ class ModelRegistry:
     llms: List[str] = field(default_factory=list)
 
 
+@dataclass
+class FaissSettings:
+    """Index tiers by corpus size: exact flat < sq8_min_docs <= SQ8 < ivf_min_docs <= IVF-PQ."""
+
+    sq8_min_docs: int = 1_000
+    nlist: int = 256
+    pq_m: int = 64
+    nprobe: int = 16
+    ivf_min_docs: int = 10_000
+
+
 @dataclass
 class AppConfig:
     data_dir: Path = CONFIG_DIR / "data"
     cache_dir: Path = CONFIG_DIR / "cache"
     model_registry: ModelRegistry = field(default_factory=ModelRegistry)
+    faiss: FaissSettings = field(default_factory=FaissSettings)
+    # Questions answered in the background at startup so the first matching user question hits the cache.
+    warm_queries: List[str] = field(default_factory=list)
 
     def to_dict(self) -> Dict:
         return {
@@ -32,6 +47,14 @@ class AppConfig:
                 "embeddings": self.model_registry.embeddings,
                 "llms": self.model_registry.llms,
             },
+            "faiss": {
+                "sq8_min_docs": self.faiss.sq8_min_docs,
+                "nlist": self.faiss.nlist,
+                "pq_m": self.faiss.pq_m,
+                "nprobe": self.faiss.nprobe,
+                "ivf_min_docs": self.faiss.ivf_min_docs,
+            },
+            "warm_queries": self.warm_queries,
         }
 
     @classmethod
@@ -44,6 +67,8 @@ class AppConfig:
                 embeddings=registry.get("embeddings", []),
                 llms=registry.get("llms", []),
             ),
+            faiss=FaissSettings(**payload.get("faiss", {})),
+            warm_queries=payload.get("warm_queries", []),
         )
 
 
@@ -52,7 +77,12 @@ def ensure_dirs(config: AppConfig) -> None:
         path.mkdir(parents=True, exist_ok=True)
 
 
+@functools.lru_cache(maxsize=1)
 def load_config() -> AppConfig:
+    """
+    Read the config file once per process; later calls return the same AppConfig.
+    save_config() invalidates it so the next call re-reads the file.
+    """
     if CONFIG_FILE.exists():
         with open(CONFIG_FILE, "r", encoding="utf-8") as f:
             payload = json.load(f)
@@ -68,6 +98,7 @@ def save_config(config: AppConfig) -> None:
     ensure_dirs(config)
     with open(CONFIG_FILE, "w", encoding="utf-8") as f:
         json.dump(config.to_dict(), f, indent=2)
+    load_config.cache_clear()
 
 
 
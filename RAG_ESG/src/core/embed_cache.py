@@ -0,0 +1,68 @@
+"""Persistent SQLite cache of chunk embeddings, keyed by SHA-256 of the chunk text."""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+EMBED_CACHE_FILE = "embeddings.sqlite3"
+
+# Stay well below SQLite's bound-parameter limit for `IN (...)` lookups.
+_SQLITE_LOOKUP_BATCH = 500
+
+
+def content_hash(text: str) -> str:
+    """Digest identifying a chunk by its text: the cache key here, and how ingestion spots duplicate chunks."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    hash -> float32 vector store shared across sessions.
+    Rows are scoped by model name, so switching embedding models never returns foreign vectors.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "hash TEXT NOT NULL, model TEXT NOT NULL, vec BLOB NOT NULL, "
+            "PRIMARY KEY (hash, model))"
+        )
+        self._conn.commit()
+
+    def get_many(self, hashes: Iterable[str], model: str) -> Dict[str, np.ndarray]:
+        """Return the cached vectors for whichever of hashes are present."""
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique), _SQLITE_LOOKUP_BATCH):
+                batch = unique[start : start + _SQLITE_LOOKUP_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT hash, vec FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch],
+                )
+                for key, vec in rows:
+                    found[key] = np.frombuffer(vec, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]], model: str) -> None:
+        rows = [(key, model, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, model, vec) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -2,47 +2,176 @@
 
 from __future__ import annotations
 
+import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import List
+from typing import Callable, FrozenSet, List, Optional, Tuple
 
+import numpy as np
 from langchain.schema import Document
 
 from src.core.config import AppConfig
 from src.db.vector_store import VectorStore
 from src.models.embedding import EmbeddingModel
 from src.models.llm import LLMModel
-from src.processors.document import DocumentProcessor
-from src.schemas import StandardizedBondInformationCard, AuditTrail
+from src.processors.document import DocumentProcessor, dedupe_documents
+from src.schemas import (
+    DISPLAY_SNIPPET_CHARS,
+    AuditTrailDC,
+    StandardizedBondInformationCard,
+    StandardizedBondInformationCardDC,
+    card_from_dc,
+)
 from src.greenwashing_verifier import GreenwashingVerifier
 from src.hybrid_parser import HybridParser
 
+# Answers kept per engine; keyed by (normalized question, corpus fingerprint) so new ingests never serve stale cards.
+QUERY_CACHE_SIZE = 128
+# Cosine similarity above which a paraphrased question reuses a cached answer.
+SEMANTIC_CACHE_THRESHOLD = 0.95
+
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_NEGATION_RE = re.compile(r"\b(?:not|no|never|without|non)\b|n't", re.IGNORECASE)
+
+QuestionSignature = Tuple[FrozenSet[str], bool]
+
+
+def normalize_question(question: str) -> str:
+    """Case- and whitespace-insensitive form of a question, used as the cache key."""
+    return " ".join(question.lower().split())
+
+
+def question_signature(question: str) -> QuestionSignature:
+    """
+    Entities and polarity of a question: tokens containing digits (ISINs, years, amounts), capitalized words
+    after the first, and whether it is negated. Embeddings of "Is bond X green?" and "Is bond Y green?" (or
+    "... not green?") can sit above the similarity threshold, so semantic hits also require equal signatures.
+    """
+    words = _WORD_RE.findall(question)
+    entities = frozenset(
+        word.lower() for i, word in enumerate(words) if any(c.isdigit() for c in word) or (i and word[0].isupper())
+    )
+    return entities, bool(_NEGATION_RE.search(question))
+
+
+class _SemanticCache:
+    """
+    Cards keyed by unit-normalized question embeddings plus the question signature; a hit is the nearest key
+    with the same signature at or above the threshold. Least recently used entries are evicted first.
+    """
+
+    def __init__(self, threshold: float, max_size: int):
+        self.threshold = threshold
+        self.max_size = max_size
+        self._keys: Optional[np.ndarray] = None
+        self._signatures: List[QuestionSignature] = []
+        self._values: List[StandardizedBondInformationCard] = []
+
+    def clear(self) -> None:
+        self._keys = None
+        self._signatures = []
+        self._values = []
+
+    def get(self, vector: np.ndarray, signature: QuestionSignature) -> Optional[StandardizedBondInformationCard]:
+        if self._keys is None:
+            return None
+        sims = self._keys @ vector
+        sims[[sig != signature for sig in self._signatures]] = -np.inf
+        best = int(np.argmax(sims))
+        if sims[best] < self.threshold:
+            return None
+        # Refresh the hit so frequently asked paraphrases are the last to be evicted.
+        card = self._values[best]
+        self._keys = np.vstack([np.delete(self._keys, best, axis=0), self._keys[best]])
+        self._signatures.append(self._signatures.pop(best))
+        self._values.append(self._values.pop(best))
+        return card
+
+    def put(self, vector: np.ndarray, signature: QuestionSignature, card: StandardizedBondInformationCard) -> None:
+        row = vector[np.newaxis, :]
+        keys = row if self._keys is None else np.vstack([self._keys, row])
+        self._keys = keys[-self.max_size :]
+        self._signatures = (self._signatures + [signature])[-self.max_size :]
+        self._values = (self._values + [card])[-self.max_size :]
+
 
 class RAGEngine:
     def __init__(self, config: AppConfig, api_key: str):
         self.config = config
         self.processor = DocumentProcessor()
-        self.embedding_model = EmbeddingModel()
-        self.vector_store = VectorStore(config.cache_dir / "faiss.index", self.embedding_model)
+        self.embedding_model = EmbeddingModel(cache_dir=config.cache_dir)
+        self.vector_store = VectorStore(
+            config.cache_dir / "faiss.index", self.embedding_model, settings=config.faiss
+        )
         self.llm = LLMModel(api_key=api_key)
         self.verifier = GreenwashingVerifier(openai_api_key=api_key)
         self.parser = HybridParser()
+        self._query_cache: OrderedDict[Tuple[str, str], StandardizedBondInformationCard] = OrderedDict()
+        self._semantic_cache = _SemanticCache(SEMANTIC_CACHE_THRESHOLD, QUERY_CACHE_SIZE)
+        self._semantic_fingerprint = ""
+        # Queries may run concurrently (user and cache warming); retrieval and the LLM run outside this lock.
+        self._cache_lock = threading.Lock()
 
     def ingest(self, paths: List[Path]) -> None:
+        self.ingest_batch(paths)
+
+    def ingest_batch(
+        self,
+        paths: List[Path],
+        batch_size: int = 64,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> int:
+        """
+        Chunk every file first, then embed the combined chunks in batches of batch_size
+        and insert/persist them in one go. on_progress receives (chunks_embedded, total).
+        Returns the number of chunks newly indexed; chunks already in the store are skipped.
+        """
         docs: List[Document] = []
         for path in paths:
             docs.extend(self.processor.process_file(path))
-        if self.vector_store._store:
-            self.vector_store.add_documents(docs)
-        else:
-            self.vector_store.load_or_create(docs)
+        docs = dedupe_documents(docs)
+        if not self.vector_store.is_ready:
+            self.vector_store.load_or_create([])
+        return self.vector_store.add_documents(docs, batch_size=batch_size, on_progress=on_progress)
 
     def query(self, question: str) -> StandardizedBondInformationCard:
-        if not self.vector_store._store:
+        if not self.vector_store.is_ready:
             self.vector_store.load_or_create([])
-        if not self.vector_store._store:
+        if not self.vector_store.is_ready:
             raise RuntimeError("No documents ingested; please add files before querying.")
 
-        results = self.vector_store.search_hybrid(question, k=5)
+        fingerprint = self.vector_store.fingerprint
+        key = (normalize_question(question), fingerprint)
+        with self._cache_lock:
+            cached = self._query_cache.get(key)
+            if cached is not None:
+                self._query_cache.move_to_end(key)
+                return cached
+
+        # Second tier: paraphrases of earlier questions, valid only for the same corpus.
+        query_vector = self.vector_store.embed_query(question)
+        signature = question_signature(question)
+        with self._cache_lock:
+            if fingerprint != self._semantic_fingerprint:
+                self._semantic_cache.clear()
+                self._semantic_fingerprint = fingerprint
+            card = self._semantic_cache.get(query_vector, signature)
+        if card is None:
+            card = self._answer(question, query_vector)
+            with self._cache_lock:
+                if fingerprint == self._semantic_fingerprint:
+                    self._semantic_cache.put(query_vector, signature, card)
+
+        with self._cache_lock:
+            self._query_cache[key] = card
+            if len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return card
+
+    def _answer(self, question: str, query_vector: np.ndarray) -> StandardizedBondInformationCard:
+        results = self.vector_store.search_hybrid(question, k=5, query_vector=query_vector)
         docs = [doc for doc, _ in results]
 
         # Greenwashing check on retrieved docs
@@ -50,24 +179,18 @@ class RAGEngine:
         verified = self.verifier.verify_claims(detections)
         green_ratio = self.verifier.green_implement_ratio(verified)
 
-        # Basic card with audit trail from retrieved docs
-        audit = [
-            AuditTrail(
-                source_document=doc.metadata.get("source", ""),
-                page_number=doc.metadata.get("page"),
-                snippet=doc.page_content[:500],
+        # Basic card with audit trail from retrieved docs; internal data is trusted, so no validation pass.
+        # dict.fromkeys drops repeated (source, page, snippet) entries while keeping retrieval order.
+        audit = tuple(
+            dict.fromkeys(
+                AuditTrailDC(
+                    source_document=doc.metadata.get("source", ""),
+                    page_number=doc.metadata.get("page"),
+                    snippet=doc.page_content[:500],
+                    display_snippet=doc.page_content[:DISPLAY_SNIPPET_CHARS],
+                )
+                for doc in docs
             )
-            for doc in docs
-        ]
-
-        return StandardizedBondInformationCard(
-            issuer=None,
-            objective=None,
-            taxonomy_category=None,
-            kpis=[],
-            greenwashing_score=green_ratio,
-            audit_trail=audit,
         )
-
-
-
+        card = StandardizedBondInformationCardDC(greenwashing_score=green_ratio, audit_trail=audit)
+        return card_from_dc(card)
@@ -2,91 +2,342 @@
 
 from __future__ import annotations
 
+import hashlib
+import pickle
+import re
+import threading
+import uuid
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
-from langchain.retrievers import BM25Retriever
+from langchain.docstore.in_memory import InMemoryDocstore
+from langchain.embeddings.base import Embeddings
 from langchain.schema import Document
 from langchain.vectorstores import FAISS
+from langchain.vectorstores.utils import DistanceStrategy
 import faiss
+import numpy as np
+from rank_bm25 import BM25Okapi
 
-from src.models.embedding import EmbeddingModel
+from src.core.config import FaissSettings
+from src.core.embed_cache import content_hash
+from src.models.embedding import EmbeddingModel, embed_in_batches
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# Index tiers in increasing order of compression.
+TIER_FLAT, TIER_SQ8, TIER_IVFPQ = 0, 1, 2
+
+
+def tier_for_size(n_docs: int, settings: FaissSettings) -> int:
+    if n_docs < settings.sq8_min_docs:
+        return TIER_FLAT
+    if n_docs < settings.ivf_min_docs:
+        return TIER_SQ8
+    return TIER_IVFPQ
+
+
+def index_tier(index: faiss.Index) -> int:
+    """Tier of an index built by train_faiss_index (IndexIDMap wrappers are looked through)."""
+    if isinstance(index, faiss.IndexIDMap):
+        index = index.index
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexFlat):
+        return TIER_FLAT
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return TIER_SQ8
+    return TIER_IVFPQ
+
+
+def train_faiss_index(vectors: np.ndarray, settings: FaissSettings) -> faiss.Index:
+    """
+    Create an empty, trained inner-product index for L2-normalized vectors.
+    Large corpora get a trained IVF-PQ index (compressed codes, nprobe cells scanned per query);
+    mid-sized ones an SQ8 index (int8 codes, 4x smaller than float32, ranges trained per dimension);
+    small ones keep an exact flat index, since there is too little data to train either quantizer.
+    """
+    dim = vectors.shape[1]
+    tier = tier_for_size(len(vectors), settings)
+    if tier == TIER_FLAT:
+        index = faiss.IndexFlatIP(dim)
+    elif tier == TIER_SQ8:
+        index = faiss.index_factory(dim, "SQ8", faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+    else:
+        index = faiss.index_factory(dim, f"IVF{settings.nlist},PQ{settings.pq_m}", faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        set_nprobe(index, settings.nprobe)
+    return index
+
+
+def build_faiss_index(vectors: np.ndarray, settings: FaissSettings) -> faiss.Index:
+    """Train an index for the vectors (see train_faiss_index) and add them."""
+    index = train_faiss_index(vectors, settings)
+    index.add(vectors)
+    return index
+
+
+def set_nprobe(index: faiss.Index, nprobe: int) -> None:
+    """Set the number of probed cells on IVF indexes; no-op for flat indexes."""
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+    try:
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    except RuntimeError:
+        pass
+
+
+class _UnitQueryEmbeddings(Embeddings):
+    """Delegates to another embedder but returns unit-length query vectors, for inner-product search."""
+
+    def __init__(self, delegate):
+        self.delegate = delegate
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.delegate.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = np.asarray(self.delegate.embed_query(text), dtype=np.float32)
+        return (vector / (np.linalg.norm(vector) or 1.0)).tolist()
+
+
+def create_faiss_store(
+    documents: List[Document], vectors: List[List[float]], embedding, settings: FaissSettings
+) -> FAISS:
+    """
+    Wrap a natively built index in LangChain's FAISS store, with an in-memory docstore.
+    Stored vectors are normalized here and queries by the embedding wrapper, so inner product is cosine similarity;
+    LangChain's own normalize_L2 flag is left off because it warns when combined with MAX_INNER_PRODUCT.
+    """
+    xb = np.asarray(vectors, dtype=np.float32)
+    faiss.normalize_L2(xb)
+    index = build_faiss_index(xb, settings)
+    ids = [str(uuid.uuid4()) for _ in documents]
+    return FAISS(
+        embedding_function=_UnitQueryEmbeddings(embedding),
+        index=index,
+        docstore=InMemoryDocstore(dict(zip(ids, documents))),
+        index_to_docstore_id=dict(enumerate(ids)),
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+    )
 
 
 class VectorStore:
-    def __init__(self, index_path: Path, embedding_model: EmbeddingModel | None = None):
+    """
+    Native FAISS index (IndexIDMap over the tiered index) plus our own docstore and BM25 state.
+    Persisted under index_path as index.faiss + docstore.pkl.
+    Index reads and writes are serialized by a lock so ingestion and queries can run on separate threads;
+    embedding happens outside it.
+    """
+
+    def __init__(
+        self,
+        index_path: Path,
+        embedding_model: EmbeddingModel | None = None,
+        settings: FaissSettings | None = None,
+    ):
         self.index_path = index_path
         self.embedding_model = embedding_model or EmbeddingModel()
-        self._store: FAISS | None = None
-        self._bm25: BM25Retriever | None = None
+        self.settings = settings or FaissSettings()
+        self._index: faiss.Index | None = None
+        self._docs_by_id: Dict[int, Document] = {}
+        self._next_id = 0
+        self._bm25: BM25Okapi | None = None
+        self._bm25_dirty = False
         self._documents: List[Document] = []
+        self._tokens: List[List[str]] = []
+        self._content_hash = hashlib.blake2b(digest_size=16)
+        self._chunk_digests: set[str] = set()
+        self._lock = threading.RLock()
 
-    def load_or_create(self, documents: List[Document]) -> FAISS:
-        if self.index_path.exists():
-            self._store = FAISS.load_local(str(self.index_path), self.embedding_model)
-            if documents:
-                self.add_documents(documents)
-        elif documents:
-            self._store = FAISS.from_documents(documents, self.embedding_model)
-            self._documents.extend(documents)
-            self.save()
-        if self._documents and not self._bm25:
-            self._bm25 = BM25Retriever.from_documents(self._documents)
-        return self._store
+    @property
+    def _index_file(self) -> Path:
+        return self.index_path / "index.faiss"
 
-    def save(self) -> None:
-        if self._store:
-            self.index_path.parent.mkdir(parents=True, exist_ok=True)
-            self._store.save_local(str(self.index_path))
-
-    def add_documents(self, documents: List[Document]) -> None:
-        if not self._store:
-            self._store = FAISS.from_documents(documents, self.embedding_model)
-        else:
-            self._store.add_documents(documents)
+    @property
+    def _docstore_file(self) -> Path:
+        return self.index_path / "docstore.pkl"
+
+    @property
+    def is_ready(self) -> bool:
+        return self._index is not None
+
+    def load_or_create(self, documents: List[Document]) -> None:
+        with self._lock:
+            if self._index is None and self._docstore_file.exists():
+                self._index = faiss.read_index(str(self._index_file))
+                set_nprobe(self._index, self.settings.nprobe)
+                with open(self._docstore_file, "rb") as f:
+                    payload = pickle.load(f)
+                self._docs_by_id = payload["docs_by_id"]
+                self._next_id = payload["next_id"]
+                tokens = payload.get("tokens")
+                if tokens is not None and len(tokens) != len(self._docs_by_id):
+                    tokens = None
+                self._track(list(self._docs_by_id.values()), tokens)
+        if documents:
+            self.add_documents(documents)
+
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        return TOKEN_RE.findall(text.lower())
+
+    def _track(self, documents: List[Document], tokens: List[List[str]] | None = None) -> None:
+        # Tokenize once on insert (or reuse persisted tokens); BM25 is rebuilt lazily on the next hybrid search.
         self._documents.extend(documents)
-        if self._documents:
-            self._bm25 = BM25Retriever.from_documents(self._documents)
-        self.save()
+        if tokens is None:
+            tokens = [self._tokenize(doc.page_content) for doc in documents]
+        self._tokens.extend(tokens)
+        for doc in documents:
+            data = doc.page_content.encode("utf-8")
+            self._content_hash.update(data)
+            self._content_hash.update(b"\0")
+            self._chunk_digests.add(content_hash(doc.page_content))
+        self._bm25_dirty = True
+
+    @property
+    def fingerprint(self) -> str:
+        """Digest of every chunk added so far; changes whenever the indexed content changes."""
+        with self._lock:
+            return self._content_hash.hexdigest()
+
+    def _ensure_bm25(self) -> None:
+        if self._bm25_dirty:
+            self._bm25 = BM25Okapi(self._tokens) if self._tokens else None
+            self._bm25_dirty = False
+
+    def _bm25_search(self, query: str, k: int) -> List[Document]:
+        self._ensure_bm25()
+        if not self._bm25:
+            return []
+        scores = self._bm25.get_scores(self._tokenize(query))
+        top = np.argsort(-scores)[:k]
+        return [self._documents[i] for i in top if scores[i] > 0]
+
+    def save(self) -> None:
+        if self._index is None:
+            return
+        self.index_path.mkdir(parents=True, exist_ok=True)
+        faiss.write_index(self._index, str(self._index_file))
+        with open(self._docstore_file, "wb") as f:
+            # Token lists follow docs_by_id order, so reloading skips re-tokenizing the corpus.
+            pickle.dump({"docs_by_id": self._docs_by_id, "next_id": self._next_id, "tokens": self._tokens}, f)
+
+    def add_documents(
+        self,
+        documents: List[Document],
+        batch_size: int = 64,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> int:
+        """
+        Embed in batches of batch_size (reporting via on_progress), then add and persist everything at once.
+        Chunks whose text is already indexed (re-ingested files, overlap between ingest batches) are skipped
+        before embedding. Returns the number of chunks added.
+        """
+        with self._lock:
+            documents = [doc for doc in documents if content_hash(doc.page_content) not in self._chunk_digests]
+        if not documents:
+            return 0
+        # Stable per-chunk id, persisted with the docstore, used to fuse vector and BM25 hits.
+        for doc in documents:
+            doc.metadata.setdefault("_id", uuid.uuid4().hex)
+
+        vectors = np.asarray(
+            embed_in_batches(
+                self.embedding_model,
+                [doc.page_content for doc in documents],
+                batch_size=batch_size,
+                on_progress=on_progress,
+            ),
+            dtype=np.float32,
+        )
+        faiss.normalize_L2(vectors)
+        with self._lock:
+            if self._index is None:
+                # The first batch decides the index tier and trains it.
+                self._index = faiss.IndexIDMap(train_faiss_index(vectors, self.settings))
+            ids = np.arange(self._next_id, self._next_id + len(documents), dtype=np.int64)
+            self._index.add_with_ids(vectors, ids)
+            self._docs_by_id.update(zip(ids.tolist(), documents))
+            self._next_id += len(documents)
 
-    def search(self, query: str, k: int = 5) -> List[Tuple[Document, float]]:
-        if not self._store:
+            self._track(documents)
+            self._upgrade_tier()
+            self.save()
+        return len(documents)
+
+    def _upgrade_tier(self) -> None:
+        """
+        Rebuild the index in a more compressed tier once the corpus has grown past its threshold.
+        The first batch picks the tier, and ingestion arrives in small batches, so without this the store
+        would stay on the flat index forever. Vectors are read back from the current index (exact for flat,
+        int8-rounded for SQ8) and re-added under their existing ids.
+        """
+        target = tier_for_size(self._index.ntotal, self.settings)
+        if target <= index_tier(self._index):
+            return
+        inner = faiss.downcast_index(self._index.index)
+        vectors = inner.reconstruct_n(0, inner.ntotal)
+        ids = faiss.vector_to_array(self._index.id_map).astype(np.int64)
+        index = faiss.IndexIDMap(train_faiss_index(vectors, self.settings))
+        index.add_with_ids(vectors, ids)
+        self._index = index
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Unit-normalized float32 query embedding, reusable across searches."""
+        query_vector = np.asarray(self.embedding_model.embed_query(query), dtype=np.float32)
+        return query_vector / (np.linalg.norm(query_vector) or 1.0)
+
+    def search(
+        self, query: str, k: int = 5, query_vector: np.ndarray | None = None
+    ) -> List[Tuple[Document, float]]:
+        if self._index is None:
             raise RuntimeError("Vector store not initialized")
-        docs_and_scores = self._store.similarity_search_with_score(query, k=k)
-        return docs_and_scores
+        if query_vector is None:
+            query_vector = self.embed_query(query)
+        with self._lock:
+            scores, ids = self._index.search(query_vector.reshape(1, -1), k)
+            return [(self._docs_by_id[i], float(score)) for score, i in zip(scores[0], ids[0].tolist()) if i != -1]
 
-    def search_hybrid(self, query: str, k: int = 5, alpha: float = 0.6) -> List[Tuple[Document, float]]:
+    def search_hybrid(
+        self, query: str, k: int = 5, alpha: float = 0.6, query_vector: np.ndarray | None = None
+    ) -> List[Tuple[Document, float]]:
         """
         Hybrid retrieval inspired by ChatPDF:
         alpha * embedding_score + (1-alpha) * bm25_score (normalized rank-based).
+        Pass query_vector (from embed_query) to reuse an embedding the caller already computed.
         """
-        if not self._store:
+        if self._index is None:
             raise RuntimeError("Vector store not initialized")
-        vector_hits = self._store.similarity_search_with_score(query, k=k * 2)
-        bm25_hits: List[Document] = self._bm25.get_relevant_documents(query) if self._bm25 else []
-
-        combined: Dict[str, Tuple[Document, float]] = {}
-
-        def doc_key(doc: Document) -> str:
-            return f"{doc.metadata.get('source','')}-{doc.metadata.get('page','')}-{hash(doc.page_content)}"
-
-        # Normalize vector scores (lower is better in FAISS distances) by inverse rank.
-        for rank, (doc, score) in enumerate(vector_hits):
-            key = doc_key(doc)
-            inv_rank_score = 1 / (1 + rank)
-            combined[key] = (doc, alpha * inv_rank_score)
-
-        # BM25 gives relevance in order; assign descending rank-based score.
-        for rank, doc in enumerate(bm25_hits):
-            key = doc_key(doc)
-            bm25_score = 1 / (1 + rank)
-            if key in combined:
-                combined[key] = (combined[key][0], combined[key][1] + (1 - alpha) * bm25_score)
-            else:
-                combined[key] = (doc, (1 - alpha) * bm25_score)
-
-        ranked = sorted(combined.values(), key=lambda x: x[1], reverse=True)
-        return ranked[:k]
+        if query_vector is None:
+            query_vector = self.embed_query(query)
+        with self._lock:
+            vector_hits = self.search(query, k=k * 2, query_vector=query_vector)
+            bm25_hits = self._bm25_search(query, k=k * 2)
+
+        # Map each distinct chunk to a contiguous slot; chunks indexed before ids existed fall back to identity.
+        docs: List[Document] = []
+        slots: Dict[object, int] = {}
+
+        def slot(doc: Document) -> int:
+            key = doc.metadata.get("_id", id(doc))
+            if key not in slots:
+                slots[key] = len(docs)
+                docs.append(doc)
+            return slots[key]
+
+        vector_slots = np.fromiter((slot(doc) for doc, _ in vector_hits), dtype=np.intp, count=len(vector_hits))
+        bm25_slots = np.fromiter((slot(doc) for doc in bm25_hits), dtype=np.intp, count=len(bm25_hits))
+
+        # Both rankers contribute an inverse-rank score.
+        scores = np.zeros(len(docs))
+        np.add.at(scores, vector_slots, alpha / (1 + np.arange(len(vector_slots))))
+        np.add.at(scores, bm25_slots, (1 - alpha) / (1 + np.arange(len(bm25_slots))))
+
+        top = np.argpartition(-scores, k)[:k] if len(docs) > k else np.arange(len(docs))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(docs[i], float(scores[i])) for i in top]
 
 
 
@@ -2,12 +2,51 @@
 
 from __future__ import annotations
 
-from typing import List, Optional, Tuple
+import json
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
 from langchain.llms import OpenAI
 from langchain.schema import Document
+from pydantic import TypeAdapter, ValidationError
+
+GREEN_TERMS = (
+    "green",
+    "renewable",
+    "solar",
+    "wind",
+    "energy efficiency",
+    "emissions",
+    "carbon",
+    "sustainable",
+    "impact",
+    "sdg",
+    "taxonomy",
+)
+
+# Claims judged per LLM call in verify_claims.
+VERIFY_BATCH_SIZE = 10
+
+# Parses the batch verifier's {"<claim number>": "<verdict>"} answer in pydantic-core. Values are checked one by one
+# in _parse_verdicts, so a single null/number verdict only sends that claim to the per-claim fallback.
+_VERDICTS = TypeAdapter(Dict[str, Any])
+
+# Normalized verdict codes stored as "verdict_enum" alongside the raw LLM verdict.
+VERDICT_IMPLEMENTED = 0
+VERDICT_EMPTY = 1
+VERDICT_UNCLEAR = 2
+
+
+def verdict_code(verdict: str) -> int:
+    """Map a free-text verdict to VERDICT_IMPLEMENTED / VERDICT_EMPTY / VERDICT_UNCLEAR."""
+    lowered = verdict.lower()
+    if "implemented" in lowered:
+        return VERDICT_IMPLEMENTED
+    if "empty" in lowered:
+        return VERDICT_EMPTY
+    return VERDICT_UNCLEAR
 
 
 class GreenwashingVerifier:
@@ -20,29 +59,19 @@ class GreenwashingVerifier:
         # Placeholder: use 4-bit quantized local LLM if available. For now, rely on GPT-4 API.
         self.llm = OpenAI(openai_api_key=openai_api_key, model_name=model, temperature=temperature)
         self._verification_chain = self._build_verification_chain()
+        self._batch_verification_chain = self._build_batch_verification_chain()
 
     def detect_claims(self, documents: List[Document]) -> List[Tuple[Document, str]]:
         """
         Layer A detection: flag snippets containing sustainability claims.
         Lightweight heuristic using green keywords; can be replaced with CLIP embeddings.
         """
-        green_terms = [
-            "green",
-            "renewable",
-            "solar",
-            "wind",
-            "energy efficiency",
-            "emissions",
-            "carbon",
-            "sustainable",
-            "impact",
-            "sdg",
-            "taxonomy",
-        ]
+        # One lower() per text and plain substring scans: faster than a case-insensitive regex alternation,
+        # which re-tries every term at every position (see scripts/bench_claims.py).
         hits = []
         for doc in documents:
             text_lower = doc.page_content.lower()
-            if any(term in text_lower for term in green_terms):
+            if any(term in text_lower for term in GREEN_TERMS):
                 hits.append((doc, "claim_detected"))
         return hits
 
@@ -50,25 +79,65 @@ class GreenwashingVerifier:
         """
         Layer B verification: judge whether claims show evidence of implementation.
         Returns a list of dicts with verdict and greenImplement score.
+        Claims are judged VERIFY_BATCH_SIZE at a time in a single prompt.
         """
         results = []
-        for doc, _ in claims:
-            verdict = self._verification_chain.run(text=doc.page_content)
-            results.append(
-                {
-                    "page": doc.metadata.get("page"),
-                    "source": doc.metadata.get("source"),
-                    "verdict": verdict,
-                }
-            )
+        for start in range(0, len(claims), VERIFY_BATCH_SIZE):
+            group = claims[start : start + VERIFY_BATCH_SIZE]
+            verdicts = self._verify_batch([doc.page_content for doc, _ in group])
+            for (doc, _), verdict in zip(group, verdicts):
+                results.append(
+                    {
+                        "page": doc.metadata.get("page"),
+                        "source": doc.metadata.get("source"),
+                        "verdict": verdict,
+                        "verdict_enum": verdict_code(verdict),
+                    }
+                )
         return results
 
+    def _verify_batch(self, texts: List[str]) -> List[str]:
+        """Judge several claims in one call; claims missing from the model's JSON answer are retried one by one."""
+        claims_json = json.dumps({str(i): text for i, text in enumerate(texts, start=1)}, ensure_ascii=False)
+        parsed = self._parse_verdicts(self._batch_verification_chain.run(claims_json=claims_json))
+        verdicts: List[Optional[str]] = [parsed.get(str(i)) for i in range(1, len(texts) + 1)]
+
+        missing = [i for i, verdict in enumerate(verdicts) if verdict is None]
+        if missing:
+            # apply() sends the single-claim prompts through one batched generate call.
+            outputs = self._verification_chain.apply([{"text": texts[i]} for i in missing])
+            for i, output in zip(missing, outputs):
+                verdicts[i] = output[self._verification_chain.output_key]
+        return verdicts
+
+    @staticmethod
+    def _parse_verdicts(raw: str) -> Dict[str, str]:
+        """
+        Extract the {"<claim number>": "<verdict>"} object from the model output; empty if malformed.
+        Entries whose verdict is not a non-empty string are dropped individually.
+        """
+        start, end = raw.find("{"), raw.rfind("}")
+        if start == -1 or end < start:
+            return {}
+        try:
+            parsed = _VERDICTS.validate_json(raw[start : end + 1])
+        except ValidationError:
+            return {}
+        return {key: value for key, value in parsed.items() if isinstance(value, str) and value.strip()}
+
     def green_implement_ratio(self, verified: List[dict]) -> float:
-        """Compute GreenImplement ratio: implemented / total."""
+        """
+        Compute GreenImplement ratio: implemented / total.
+        Entries without "verdict_enum" (the pre-enum result shape) are classified from "verdict".
+        """
         if not verified:
             return 0.0
-        implemented = sum(1 for v in verified if "implemented" in v["verdict"].lower())
-        return implemented / len(verified)
+        codes = np.fromiter(
+            (v["verdict_enum"] if "verdict_enum" in v else verdict_code(v["verdict"]) for v in verified),
+            dtype=np.int8,
+            count=len(verified),
+        )
+        return float((codes == VERDICT_IMPLEMENTED).mean())
 
     def _build_verification_chain(self) -> LLMChain:
         template = """
@@ -81,5 +150,17 @@ Text:
         prompt = PromptTemplate(template=template, input_variables=["text"])
         return LLMChain(llm=self.llm, prompt=prompt)
 
+    def _build_batch_verification_chain(self) -> LLMChain:
+        template = """
+You are the GreenwashingVerifier. For each numbered claim, decide if it shows evidence of IMPLEMENTATION.
+Judge every claim with one of: "implemented", "empty", or "unclear".
+Respond with a single JSON object mapping each claim number to its verdict, e.g. {{"1": "implemented", "2": "empty"}}.
+
+Claims (JSON):
+{claims_json}
+"""
+        prompt = PromptTemplate(template=template, input_variables=["claims_json"])
+        return LLMChain(llm=self.llm, prompt=prompt)
+
 
 
@@ -3,11 +3,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+from src.processors.splitter import get_splitter
+
 
 @dataclass
 class LinkedCell:
@@ -33,9 +35,7 @@ class HybridParser:
     """
 
     def __init__(self, text_splitter: Optional[RecursiveCharacterTextSplitter] = None):
-        self.text_splitter = text_splitter or RecursiveCharacterTextSplitter(
-            chunk_size=800, chunk_overlap=120
-        )
+        self.text_splitter = text_splitter or get_splitter(800, 120)
 
     def parse_document(self, document: Document) -> List[LinkedCell]:
         """
@@ -45,11 +45,15 @@ class HybridParser:
         # Placeholder: in production, replace with PDF table extractor (camelot/tabula)
         tables = document.metadata.get("tables", [])
         narrative_chunks = self._split_text(document)
+        # Group once so each cell lookup is a dict hit instead of a scan over all chunks.
+        chunks_by_page: Dict[Any, List[Document]] = {}
+        for chunk in narrative_chunks:
+            chunks_by_page.setdefault(chunk.metadata.get("page"), []).append(chunk)
 
         linked_cells: List[LinkedCell] = []
         for table in tables:
             for cell in table.get("cells", []):
-                linked = self._link_cell(cell, narrative_chunks, document)
+                linked = self._link_cell(cell, narrative_chunks, chunks_by_page, document)
                 if linked:
                     linked_cells.append(linked)
         return linked_cells
@@ -58,13 +62,19 @@ class HybridParser:
         """Split text into manageable chunks for contextual lookup."""
         return self.text_splitter.split_documents([document])
 
-    def _link_cell(self, cell: dict, narrative_chunks: List[Document], document: Document) -> Optional[LinkedCell]:
+    def _link_cell(
+        self,
+        cell: dict,
+        narrative_chunks: List[Document],
+        chunks_by_page: Dict[Any, List[Document]],
+        document: Document,
+    ) -> Optional[LinkedCell]:
         """Link a table cell to the closest narrative snippet (same page preference)."""
         page = cell.get("page", document.metadata.get("page"))
         source = document.metadata.get("source", "unknown")
 
         # Prefer chunks on the same page; otherwise fall back to nearest chunk.
-        same_page = [c for c in narrative_chunks if c.metadata.get("page") == page]
+        same_page = chunks_by_page.get(page, [])
         target_chunk = (same_page or narrative_chunks or [Document(page_content="")])[0]
 
         return LinkedCell(
@@ -2,22 +2,107 @@
 
 from __future__ import annotations
 
-from typing import List
+from pathlib import Path
+from typing import Callable, List, Optional
 
-from langchain.embeddings import HuggingFaceInstructEmbeddings
+import numpy as np
+from langchain.embeddings.base import Embeddings
 
+from src.core.embed_cache import EMBED_CACHE_FILE, EmbeddingCache, content_hash
+
+
+def embed_in_batches(
+    embedder,
+    texts: List[str],
+    batch_size: int = 64,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> List[List[float]]:
+    """
+    Embed texts with one embed_documents call per batch.
+    Texts are grouped by length so each batch pads to a similar size; vectors are returned in input order.
+    on_progress, if given, is called as (texts_done, total) after each batch.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    vectors: List[List[float]] = [[] for _ in texts]
+    for start in range(0, len(order), batch_size):
+        batch = order[start : start + batch_size]
+        for i, vector in zip(batch, embedder.embed_documents([texts[i] for i in batch])):
+            vectors[i] = vector
+        if on_progress:
+            on_progress(start + len(batch), len(texts))
+    return vectors
 
-class EmbeddingModel:
-    def __init__(self, model_name: str = "sentence-transformers/clip-ViT-B-32"):
-        # Placeholder for 8-bit quantized CLIP; using HF instruct embeddings wrapper.
-        self.model_name = model_name
-        self._model = HuggingFaceInstructEmbeddings(model_name=model_name)
+
+class CachedEmbeddings(Embeddings):
+    """
+    embed_documents backed by an EmbeddingCache: only chunks whose SHA-256 is not cached for this model
+    are sent to the delegate, and their vectors are written back. Queries always go to the delegate.
+    """
+
+    def __init__(self, delegate, cache: EmbeddingCache, model: str):
+        self.delegate = delegate
+        self.cache = cache
+        self.model = model
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        return self._model.embed_documents(texts)
+        keys = [content_hash(text) for text in texts]
+        found = {key: vec.tolist() for key, vec in self.cache.get_many(keys, self.model).items()}
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = self.delegate.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed, self.model)
+            found.update(computed)
+        return [found[key] for key in keys]
 
     def embed_query(self, text: str) -> List[float]:
-        return self._model.embed_query(text)
+        return self.delegate.embed_query(text)
+
+
+class _SentenceTransformerEncoder(Embeddings):
+    """Batched sentence-transformers encoding; FP16 on GPU, normalized float32 vectors out."""
 
+    def __init__(self, model_name: str, batch_size: int = 64):
+        # Imported here so modules that only need the helpers above do not load torch.
+        import torch
+        from sentence_transformers import SentenceTransformer
 
+        self.batch_size = batch_size
+        self._st = SentenceTransformer(model_name, device="cuda" if torch.cuda.is_available() else "cpu")
+        if self._st.device.type == "cuda":
+            self._st.half()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # encode() already length-sorts its input into batches and restores the original order.
+        vectors = self._st.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return vectors.astype(np.float32).tolist()
 
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class EmbeddingModel(Embeddings):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/clip-ViT-B-32",
+        cache_dir: Optional[Path] = None,
+    ):
+        # Placeholder for 8-bit quantized CLIP; encodes with sentence-transformers directly.
+        self.model_name = model_name
+        self._model: Embeddings = _SentenceTransformerEncoder(model_name)
+        if cache_dir is not None:
+            self._model = CachedEmbeddings(self._model, EmbeddingCache(cache_dir / EMBED_CACHE_FILE), model=model_name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._model.embed_query(text)
@@ -4,25 +4,43 @@ from __future__ import annotations
 
 import io
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
 from langchain.document_loaders import (
-    PyPDFLoader,
     TextLoader,
     UnstructuredMarkdownLoader,
     Docx2txtLoader,
 )
 from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from PIL import Image
 
+from src.core.embed_cache import content_hash
+from src.processors.pdf import load_pdf_pages
+from src.processors.splitter import split_documents
+
+
+def dedupe_documents(docs: List[Document]) -> List[Document]:
+    """
+    Drop chunks whose text is byte-identical to an earlier chunk.
+    The kept chunk records every occurrence's metadata under metadata["sources"] so citations are not lost.
+    """
+    groups: Dict[str, List[Document]] = {}
+    for doc in docs:
+        groups.setdefault(content_hash(doc.page_content), []).append(doc)
+
+    unique: List[Document] = []
+    for group in groups.values():
+        kept = group[0]
+        if len(group) > 1:
+            kept.metadata["sources"] = [dict(doc.metadata) for doc in group]
+        unique.append(kept)
+    return unique
+
 
 class DocumentProcessor:
     def __init__(self, chunk_size: int = 800, chunk_overlap: int = 120):
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-        )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
 
     def process_file(self, path: Path) -> List[Document]:
         suffix = path.suffix.lower()
@@ -39,11 +57,10 @@ class DocumentProcessor:
         raise ValueError(f"Unsupported file type: {suffix}")
 
     def _split(self, docs: List[Document]) -> List[Document]:
-        return self.splitter.split_documents(docs)
+        return split_documents(docs, self.chunk_size, self.chunk_overlap)
 
     def _load_pdf(self, path: Path) -> List[Document]:
-        loader = PyPDFLoader(str(path))
-        return self._split(loader.load())
+        return self._split(load_pdf_pages(path, str(path)))
 
     def _load_text(self, path: Path) -> List[Document]:
         loader = TextLoader(str(path), autodetect_encoding=True)
@@ -0,0 +1,46 @@
+"""Shared text splitters: one instance per (chunk_size, chunk_overlap), reused across calls."""
+
+from __future__ import annotations
+
+import copy
+import functools
+from typing import List
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+
+@functools.lru_cache(maxsize=8)
+def get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=SEPARATORS,
+    )
+
+
+def split_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """Split text into chunks; text that already fits in one chunk skips the splitter."""
+    if len(text) <= chunk_size:
+        text = text.strip()
+        return [text] if text else []
+    return get_splitter(chunk_size, chunk_overlap).split_text(text)
+
+
+def split_documents(documents: List[Document], chunk_size: int, chunk_overlap: int) -> List[Document]:
+    """
+    Split documents into chunks. Documents that already fit in one chunk skip the splitter but come out the
+    same way it would emit them: stripped text on a new Document with a copy of the metadata.
+    """
+    splitter = get_splitter(chunk_size, chunk_overlap)
+    chunks: List[Document] = []
+    for doc in documents:
+        if len(doc.page_content) <= chunk_size:
+            text = doc.page_content.strip()
+            if text:
+                chunks.append(Document(page_content=text, metadata=copy.deepcopy(doc.metadata)))
+        else:
+            chunks.extend(splitter.split_documents([doc]))
+    return chunks
@@ -1,17 +1,47 @@
 """Shared Pydantic schemas for GreenBond-RAG outputs."""
 
-from typing import List, Optional
+from dataclasses import asdict, dataclass, field
+from typing import Optional, Tuple
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic.json_schema import SkipJsonSchema
 
+# Characters of each audit snippet shown in the chat.
+DISPLAY_SNIPPET_CHARS = 160
 
-class AuditTrail(BaseModel):
+
+class _Schema(BaseModel):
+    # Cards are built once and then only read (cached, rendered): fields cannot be reassigned, unknown keys are
+    # rejected, and collection fields are tuples so a cached card cannot be changed in place.
+    model_config = ConfigDict(frozen=True, extra="forbid", validate_assignment=False, revalidate_instances="never")
+
+    @classmethod
+    def build_trusted(cls, **data):
+        """Construct from already-typed internal data without running validators (model_construct)."""
+        return cls.model_construct(**data)
+
+
+class AuditTrail(_Schema):
     source_document: str = Field(..., description="Title or filename of the source document.")
     page_number: Optional[int] = Field(None, description="Page number where the content was retrieved.")
     snippet: str = Field(..., description="Exact retrieved text or table cell content.")
+    # UI-only, derived from snippet: kept out of the JSON schema given to the LLM and out of serialized cards.
+    display_snippet: SkipJsonSchema[Optional[str]] = Field(None, exclude=True)
+
+    def _identity(self) -> Tuple[str, Optional[int], str]:
+        # Identity of an audit entry is where it came from and what it says; display_snippet is derived.
+        return (self.source_document, self.page_number, self.snippet)
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, AuditTrail):
+            return NotImplemented
+        return self._identity() == other._identity()
 
-class IssueDetails(BaseModel):
+    def __hash__(self) -> int:
+        return hash(self._identity())
+
+
+class IssueDetails(_Schema):
     isin: Optional[str] = Field(None, description="Bond ISIN identifier.")
     tenor_years: Optional[float] = Field(None, description="Tenor in years.")
     coupon_rate: Optional[float] = Field(None, description="Coupon rate as percentage.")
@@ -19,8 +49,9 @@ class IssueDetails(BaseModel):
     currency: Optional[str] = Field(None, description="Currency code, e.g., USD, EUR.")
 
 
-class ESGAlignment(BaseModel):
-    sdg_alignment: List[str] = Field(default_factory=list, description="Relevant SDG codes, e.g., SDG7, SDG11.")
+class ESGAlignment(_Schema):
+    # A tuple, not a list: the empty instance below is shared by every card, and frozen=True is shallow.
+    sdg_alignment: Tuple[str, ...] = Field(default_factory=tuple, description="Relevant SDG codes, e.g., SDG7, SDG11.")
     eu_taxonomy_status: Optional[str] = Field(
         None, description="Eligible, Aligned, or Not Aligned per EU Taxonomy."
     )
@@ -29,7 +60,13 @@ class ESGAlignment(BaseModel):
     )
 
 
-class KPI(BaseModel):
+# Shared empty sub-models for cards that leave these sections unpopulated. Safe to share because both models are
+# frozen and hold only immutable values.
+_EMPTY_ISSUE = IssueDetails.model_construct()
+_EMPTY_ESG = ESGAlignment.model_construct()
+
+
+class KPI(_Schema):
     name: str
     value: Optional[float] = None
     unit: Optional[str] = None
@@ -40,7 +77,7 @@ class KPI(BaseModel):
     audit: Optional[AuditTrail] = None
 
 
-class StandardizedBondInformationCard(BaseModel):
+class StandardizedBondInformationCard(_Schema):
     """Default LLM response schema for bond-level answers."""
 
     issuer: Optional[str] = Field(None, description="Issuing entity name.")
@@ -50,21 +87,87 @@ class StandardizedBondInformationCard(BaseModel):
     taxonomy_category: Optional[str] = Field(
         None, description="Mapped taxonomy category (renewable energy, green buildings, etc.)."
     )
-    issue_details: IssueDetails = Field(default_factory=IssueDetails)
-    esg_alignment: ESGAlignment = Field(default_factory=ESGAlignment)
-    kpis: List[KPI] = Field(default_factory=list, description="Standardized KPIs with methodology linkage.")
+    issue_details: IssueDetails = Field(default_factory=lambda: _EMPTY_ISSUE)
+    esg_alignment: ESGAlignment = Field(default_factory=lambda: _EMPTY_ESG)
+    kpis: Tuple[KPI, ...] = Field(default_factory=tuple, description="Standardized KPIs with methodology linkage.")
     greenwashing_score: Optional[float] = Field(
         None, description="GreenImplement ratio from verification (0-1)."
     )
-    alerts: List[str] = Field(
-        default_factory=list, description="Missing reports, ambiguous claims, or data quality flags."
+    alerts: Tuple[str, ...] = Field(
+        default_factory=tuple, description="Missing reports, ambiguous claims, or data quality flags."
+    )
+    audit_trail: Tuple[AuditTrail, ...] = Field(
+        default_factory=tuple, description="All snippets used to build the card."
     )
-    audit_trail: List[AuditTrail] = Field(
-        default_factory=list, description="All snippets used to build the card."
+
+
+# Validation-free mirrors used while the engine assembles a card; converted with card_from_dc.
+
+
+@dataclass(slots=True, frozen=True)
+class AuditTrailDC:
+    source_document: str
+    page_number: Optional[int]
+    snippet: str
+    # Derived from the snippet, so left out of equality/hashing; duplicates collapse via dict.fromkeys.
+    display_snippet: Optional[str] = field(default=None, compare=False)
+
+
+@dataclass(slots=True, frozen=True)
+class KPIDC:
+    name: str
+    value: Optional[float] = None
+    unit: Optional[str] = None
+    methodology: Optional[str] = None
+    peer_percentile: Optional[float] = None
+    audit: Optional[AuditTrailDC] = None
+
+
+@dataclass(slots=True, frozen=True)
+class StandardizedBondInformationCardDC:
+    issuer: Optional[str] = None
+    objective: Optional[str] = None
+    location: Optional[str] = None
+    developer: Optional[str] = None
+    taxonomy_category: Optional[str] = None
+    kpis: Tuple[KPIDC, ...] = ()
+    greenwashing_score: Optional[float] = None
+    alerts: Tuple[str, ...] = ()
+    audit_trail: Tuple[AuditTrailDC, ...] = ()
+
+
+def card_from_dc(card: StandardizedBondInformationCardDC) -> StandardizedBondInformationCard:
+    """Convert an engine-assembled card to the response model; fields are trusted, so nothing is re-validated."""
+    return StandardizedBondInformationCard.build_trusted(
+        issuer=card.issuer,
+        objective=card.objective,
+        location=card.location,
+        developer=card.developer,
+        taxonomy_category=card.taxonomy_category,
+        issue_details=_EMPTY_ISSUE,
+        esg_alignment=_EMPTY_ESG,
+        kpis=tuple(
+            KPI.build_trusted(**{**asdict(kpi), "audit": kpi.audit and AuditTrail.build_trusted(**asdict(kpi.audit))})
+            for kpi in card.kpis
+        ),
+        greenwashing_score=card.greenwashing_score,
+        alerts=card.alerts,
+        audit_trail=tuple(AuditTrail.build_trusted(**asdict(audit)) for audit in card.audit_trail),
     )
 
 
-__all__ = ["AuditTrail", "IssueDetails", "ESGAlignment", "KPI", "StandardizedBondInformationCard"]
+__all__ = [
+    "DISPLAY_SNIPPET_CHARS",
+    "AuditTrail",
+    "IssueDetails",
+    "ESGAlignment",
+    "KPI",
+    "StandardizedBondInformationCard",
+    "AuditTrailDC",
+    "KPIDC",
+    "StandardizedBondInformationCardDC",
+    "card_from_dc",
+]
 
 
 
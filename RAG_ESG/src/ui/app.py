@@ -1,15 +1,40 @@
 """Tkinter application entrypoint for DeskRAG."""
 
+import logging
+import queue
+import threading
 import tkinter as tk
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
 
 from src.core.config import load_config
-from src.core.rag_engine import RAGEngine
-from src.ui.components import FileSelector, ChatBox
+from src.schemas import DISPLAY_SNIPPET_CHARS
+
+if TYPE_CHECKING:
+    from src.core.rag_engine import RAGEngine
+
+logger = logging.getLogger(__name__)
+
+# Files handed to each engine.ingest_batch call, so embedding starts before the whole selection is consumed.
+INGEST_FILES_PER_BATCH = 16
+# How often the Tk thread drains results posted by worker threads.
+UI_POLL_MS = 50
+
+
+class _Cancelled(Exception):
+    """Raised inside a worker to stop ingestion once the window is closing."""
 
 
 class DeskRAGApp(tk.Tk):
+    engine: "RAGEngine"
+
     def __init__(self, api_key: str):
+        # Deferred so importing this module does not pull in the RAG stack (langchain, faiss, torch).
+        from src.core.rag_engine import RAGEngine
+        from src.ui.components import ChatBox, FileSelector
+
         super().__init__()
         self.title("DeskRAG - GreenBond RAG")
         self.geometry("720x640")
@@ -23,17 +48,154 @@ class DeskRAGApp(tk.Tk):
         self.chat = ChatBox(self, on_send=self.on_send)
         self.chat.pack(fill="both", expand=True)
 
-    def on_files_selected(self, paths: list[Path]):
-        self.chat.append(f"Ingesting {len(paths)} file(s)...")
-        self.engine.ingest(paths)
-        self.chat.append("Ingestion complete.")
+        # Work runs off the Tk thread so the event loop keeps repainting. User queries get their own worker (Ask is
+        # disabled while one is in flight), so ingestion and cache warming can never queue ahead of them.
+        # Workers never touch Tk: they post (callback, args) to _ui_queue, which the Tk thread drains.
+        self._query_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="deskrag-query")
+        self._background_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="deskrag-background")
+        self._ui_queue: "queue.Queue[tuple[Callable[..., None], tuple]]" = queue.Queue()
+        self._cancel = threading.Event()
+        self._closed = False
+        self._poll_id = self.after(UI_POLL_MS, self._drain_ui_queue)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Warming and ingestion both mutate/scan the store in bulk; they take turns rather than overlap.
+        self._background_lock = threading.Lock()
+
+        # Pre-answer configured questions so they hit the engine's caches; stops once the user asks something.
+        self._warm_queries: list[str] = list(self.config_obj.warm_queries)
+        self._warming = bool(self._warm_queries)
+        if self._warming:
+            self._background_pool.submit(self._warm)
+
+    def _submit(
+        self,
+        on_done: Callable[[Any], None],
+        fn: Callable[..., Any],
+        *args,
+        busy: bool = False,
+        background: bool = False,
+        **kwargs,
+    ) -> Future:
+        """
+        Run fn on a worker thread and hand its result to on_done on the Tk thread.
+        With busy=True the Ask button stays disabled until fn finishes; background=True runs fn on the
+        ingestion/warming pool instead of the query worker.
+        """
+        if busy:
+            self.chat.set_busy(True)
+        pool = self._background_pool if background else self._query_pool
+        future = pool.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda f: self._call_in_ui(self._finish, f, on_done, busy))
+        return future
+
+    def _call_in_ui(self, callback: Callable[..., None], *args):
+        # Safe from any thread; the callback runs on the Tk thread at the next poll.
+        self._ui_queue.put((callback, args))
+
+    def _drain_ui_queue(self):
+        while True:
+            try:
+                callback, args = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception:
+                # One failing callback must not stop polling, or later results and errors would never show.
+                logger.exception("UI callback %r failed", callback)
+        self._poll_id = self.after(UI_POLL_MS, self._drain_ui_queue)
+
+    def _finish(self, future: Future, on_done: Callable[[Any], None], busy: bool):
+        if busy:
+            self.chat.set_busy(False)
+        try:
+            result = future.result()
+        except _Cancelled:
+            return
+        except Exception as exc:
+            self.chat.append(f"Error: {exc}")
+            return
+        on_done(result)
+
+    def on_files_selected(self, paths: Iterable[Path]):
+        self.chat.append("Ingesting files...")
+        self._submit(self._on_ingest_done, self._ingest_files, iter(paths), background=True)
+
+    def _ingest_files(self, paths: Iterator[Path]) -> int:
+        # Runs on the worker thread; pulls the selection lazily, INGEST_FILES_PER_BATCH files at a time.
+        chunks = 0
+        while batch := list(islice(paths, INGEST_FILES_PER_BATCH)):
+            if self._cancel.is_set():
+                raise _Cancelled
+            with self._background_lock:
+                chunks += self.engine.ingest_batch(batch, on_progress=self._on_ingest_progress)
+        return chunks
+
+    def _on_ingest_progress(self, done: int, total: int):
+        # Called from the worker thread between embedding batches; aborting here leaves the index untouched.
+        if self._cancel.is_set():
+            raise _Cancelled
+        self._call_in_ui(self.chat.append, f"Embedded {done}/{total} chunks")
+
+    def _on_ingest_done(self, chunks: int):
+        self.chat.append(f"Ingestion complete ({chunks} chunks).")
+
+    def _warm(self):
+        # Runs on the background pool, one question at a time between ingestion batches.
+        # An empty store is the normal first-run state, not a failure: skip quietly instead of logging a traceback.
+        store = self.engine.vector_store
+        with self._background_lock:
+            try:
+                store.load_or_create([])
+            except Exception:
+                logger.exception("Cache warming could not load the index")
+        if not store.is_ready:
+            logger.info("Nothing ingested yet; skipping cache warming")
+            self._warming = False
+            return
+        for question in self._warm_queries:
+            if not self._warming or self._cancel.is_set():
+                break
+            with self._background_lock:
+                try:
+                    self.engine.query(question)
+                except Exception:
+                    # A bad API key or an unreachable LLM; warming is best-effort.
+                    logger.exception("Cache warming stopped at %r", question)
+                    break
+        self._warming = False
 
     def on_send(self, question: str):
+        self._warming = False
         self.chat.append(f"Q: {question}")
-        card = self.engine.query(question)
-        self.chat.append(f"A (greenwashing_score={card.greenwashing_score}):")
-        for audit in card.audit_trail:
-            self.chat.append(f"- {audit.source_document} p{audit.page_number}: {audit.snippet[:160]}")
+        self._submit(self._on_query_done, self.engine.query, question, busy=True)
+
+    def _on_query_done(self, card):
+        body = "\n".join(
+            "- %s p%s: %s" % (
+                audit.source_document,
+                audit.page_number,
+                audit.display_snippet or audit.snippet[:DISPLAY_SNIPPET_CHARS],
+            )
+            for audit in card.audit_trail
+        )
+        header = "A (greenwashing_score=%s):" % card.greenwashing_score
+        self.chat.append([header, body] if body else header)
+
+    def on_close(self):
+        """
+        Stop ingestion at the next batch boundary, wait for in-flight work (a running LLM call cannot be
+        interrupted), then tear down Tk. Workers only post to the queue, so waiting here cannot deadlock.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._cancel.set()
+        self.withdraw()
+        for pool in (self._background_pool, self._query_pool):
+            pool.shutdown(wait=True, cancel_futures=True)
+        self.after_cancel(self._poll_id)
+        self.destroy()
 
 
 def main():
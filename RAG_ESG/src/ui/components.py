@@ -3,11 +3,14 @@
 import tkinter as tk
 from tkinter import ttk, filedialog
 from pathlib import Path
-from typing import Callable, List
+from typing import Callable, Iterable, List, Union
+
+# Lines kept in the chat log; older ones are dropped so insert/scroll cost stays flat in long sessions.
+CHAT_MAX_LINES = 2000
 
 
 class FileSelector(ttk.Frame):
-    def __init__(self, master, on_files_selected: Callable[[List[Path]], None]):
+    def __init__(self, master, on_files_selected: Callable[[Iterable[Path]], None]):
         super().__init__(master)
         self.on_files_selected = on_files_selected
         self.button = ttk.Button(self, text="Add files", command=self.open_dialog)
@@ -18,19 +21,21 @@ class FileSelector(ttk.Frame):
             filetypes=[("Documents", "*.pdf *.txt *.md *.markdown *.png *.jpg *.jpeg")]
         )
         if file_paths:
-            self.on_files_selected([Path(p) for p in file_paths])
+            self.on_files_selected(map(Path, file_paths))
 
 
 class ChatBox(ttk.Frame):
-    def __init__(self, master, on_send: Callable[[str], None]):
+    def __init__(self, master, on_send: Callable[[str], None], max_lines: int = CHAT_MAX_LINES):
         super().__init__(master)
         self.on_send = on_send
+        self.max_lines = max_lines
         self.text = tk.Text(self, height=15, wrap="word")
         self.entry = ttk.Entry(self)
         self.send = ttk.Button(self, text="Ask", command=self._send)
         self.text.pack(fill="both", expand=True, padx=4, pady=4)
         self.entry.pack(fill="x", padx=4)
         self.send.pack(padx=4, pady=4)
+        self._see_pending = False
 
     def _send(self):
         question = self.entry.get()
@@ -38,8 +43,26 @@ class ChatBox(ttk.Frame):
             self.on_send(question)
             self.entry.delete(0, tk.END)
 
-    def append(self, message: str):
+    def set_busy(self, busy: bool):
+        """Disable the Ask button while a query is in flight."""
+        self.send.configure(state="disabled" if busy else "normal")
+
+    def append(self, message: Union[str, List[str]]):
+        """Append one line or several; several lines go in with a single insert."""
+        if not isinstance(message, str):
+            message = "\n".join(message)
         self.text.insert(tk.END, message + "\n")
+        # "end-1c" sits on the empty line after the trailing newline, so this is the logical line count + 1.
+        excess = int(self.text.index("end-1c").split(".")[0]) - 1 - self.max_lines
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+        # Scroll once per idle pass rather than once per append.
+        if not self._see_pending:
+            self._see_pending = True
+            self.after_idle(self._flush_see)
+
+    def _flush_see(self):
+        self._see_pending = False
         self.text.see(tk.END)
 
 
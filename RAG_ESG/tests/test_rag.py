@@ -1,7 +1,34 @@
+import hashlib
+import tkinter as tk
+import warnings
 from pathlib import Path
 
-from src.core.config import load_config
-from src.core.rag_engine import RAGEngine
+import fitz
+import numpy as np
+import pytest
+from langchain.schema import Document
+from pydantic import ValidationError
+
+import src.core.config as config_module
+import src.core.rag_engine as rag_engine
+from src.core.config import AppConfig, FaissSettings, load_config
+from src.core.embed_cache import EmbeddingCache
+from src.core.rag_engine import RAGEngine, _SemanticCache, question_signature
+from src.db.vector_store import TIER_FLAT, TIER_IVFPQ, TIER_SQ8, VectorStore, create_faiss_store, index_tier
+from src.greenwashing_verifier import VERDICT_EMPTY, VERDICT_IMPLEMENTED, VERDICT_UNCLEAR, GreenwashingVerifier
+from src.models.embedding import CachedEmbeddings
+from src.processors.pdf import page_text
+from src.processors.splitter import get_splitter, split_documents
+from src.schemas import (
+    KPIDC,
+    AuditTrail,
+    AuditTrailDC,
+    ESGAlignment,
+    StandardizedBondInformationCard,
+    StandardizedBondInformationCardDC,
+    card_from_dc,
+)
+from src.ui.components import ChatBox
 
 
 def test_engine_init(monkeypatch):
@@ -11,4 +38,334 @@ def test_engine_init(monkeypatch):
     assert engine is not None
 
 
+def test_cached_embeddings_only_embeds_misses(tmp_path):
+    class FakeEmbedder:
+        def __init__(self):
+            self.calls = []
+
+        def embed_documents(self, texts):
+            self.calls.append(list(texts))
+            return [[float(len(t)), 1.0] for t in texts]
+
+        def embed_query(self, text):
+            return [float(len(text)), 1.0]
+
+    delegate = FakeEmbedder()
+    cache = CachedEmbeddings(delegate, EmbeddingCache(tmp_path / "embeddings.sqlite3"), model="fake")
+    assert cache.embed_documents(["a", "bb"]) == [[1.0, 1.0], [2.0, 1.0]]
+    assert cache.embed_documents(["bb", "ccc", "a"]) == [[2.0, 1.0], [3.0, 1.0], [1.0, 1.0]]
+    assert delegate.calls == [["a", "bb"], ["ccc"]]
+
+
+def test_card_from_dc_builds_nested_models():
+    audit = AuditTrailDC(source_document="report.pdf", page_number=3, snippet="Solar capacity 120 MW")
+    card = card_from_dc(
+        StandardizedBondInformationCardDC(
+            greenwashing_score=0.5,
+            kpis=(KPIDC(name="capacity", value=120.0, unit="MW", audit=audit),),
+            audit_trail=(audit,),
+        )
+    )
+    assert card.greenwashing_score == 0.5
+    assert isinstance(card.kpis[0].audit, AuditTrail)
+    assert card.audit_trail[0].page_number == 3
+
+
+def test_empty_card_sections_are_not_shared_mutably():
+    first = StandardizedBondInformationCard()
+    second = StandardizedBondInformationCard()
+    with pytest.raises(AttributeError):
+        first.esg_alignment.sdg_alignment.append("SDG7")
+    first = first.model_copy(update={"esg_alignment": ESGAlignment(sdg_alignment=["SDG7"])})
+    assert first.esg_alignment.sdg_alignment == ("SDG7",)
+    assert second.esg_alignment.sdg_alignment == ()
+    assert StandardizedBondInformationCard().esg_alignment.sdg_alignment == ()
+
+
+class _HashEmbedder:
+    """Deterministic 8-d embeddings derived from the text, for vector-store tests."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "little")
+        return np.random.default_rng(seed).standard_normal(8).tolist()
+
+
+def test_vector_store_upgrades_index_tier_as_batches_arrive(tmp_path):
+    settings = FaissSettings(sq8_min_docs=20, ivf_min_docs=300, nlist=4, pq_m=4, nprobe=4)
+    store = VectorStore(tmp_path / "index", embedding_model=_HashEmbedder(), settings=settings)
+    tiers = []
+    for batch in range(32):
+        store.add_documents([Document(page_content=f"chunk {batch}-{i}") for i in range(10)])
+        tiers.append(index_tier(store._index))
+
+    assert tiers[0] == TIER_FLAT
+    assert tiers[1] == TIER_SQ8
+    assert tiers[-1] == TIER_IVFPQ
+    assert store._index.ntotal == 320
+    # Ids survive each rebuild: the nearest hit for a chunk's own text is that chunk.
+    doc, _ = store.search("chunk 3-7", k=1)[0]
+    assert doc.page_content == "chunk 3-7"
+
+
+def test_green_implement_ratio_accepts_both_result_shapes(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    verifier = GreenwashingVerifier(openai_api_key="test-key")
+    legacy = [{"verdict": "Implemented"}, {"verdict": "empty promise"}, {"verdict": "unclear"}, {"verdict": "implemented"}]
+    current = [
+        {"verdict": "implemented", "verdict_enum": VERDICT_IMPLEMENTED},
+        {"verdict": "empty", "verdict_enum": VERDICT_EMPTY},
+    ]
+    assert verifier.green_implement_ratio(legacy) == 0.5
+    assert verifier.green_implement_ratio(current) == 0.5
+    assert verifier.green_implement_ratio(legacy[:1] + current[1:]) == 0.5
+    assert verifier.green_implement_ratio([]) == 0.0
+
+
+def test_verify_claims_batches_and_falls_back_per_claim(monkeypatch):
+    class BatchChain:
+        def __init__(self):
+            self.calls = []
+
+        def run(self, claims_json):
+            self.calls.append(claims_json)
+            return 'Verdicts: {"1": "implemented", "2": null, "3": 7, "4": "empty"} done'
+
+    class SingleChain:
+        output_key = "text"
+
+        def __init__(self):
+            self.calls = []
+
+        def apply(self, inputs):
+            self.calls.append([item["text"] for item in inputs])
+            return [{"text": "unclear"} for _ in inputs]
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    verifier = GreenwashingVerifier(openai_api_key="test-key")
+    verifier._batch_verification_chain = BatchChain()
+    verifier._verification_chain = SingleChain()
+
+    docs = [Document(page_content=f"solar claim {i}", metadata={"page": i, "source": "r.pdf"}) for i in range(1, 5)]
+    results = verifier.verify_claims(verifier.detect_claims(docs))
+
+    assert len(verifier._batch_verification_chain.calls) == 1
+    # Only the null and numeric verdicts are re-asked, in one batched apply() call.
+    assert verifier._verification_chain.calls == [["solar claim 2", "solar claim 3"]]
+    assert [r["verdict_enum"] for r in results] == [VERDICT_IMPLEMENTED, VERDICT_UNCLEAR, VERDICT_UNCLEAR, VERDICT_EMPTY]
+    assert [r["page"] for r in results] == [1, 2, 3, 4]
+    assert GreenwashingVerifier._parse_verdicts("no json here") == {}
+    assert GreenwashingVerifier._parse_verdicts('["implemented"]') == {}
+
+
+def test_semantic_cache_respects_entities_negation_and_recency():
+    cache = _SemanticCache(threshold=0.95, max_size=2)
+    vector = np.array([1.0, 0.0, 0.0])
+    cache.put(vector, question_signature("Is bond X green?"), "card-x")
+
+    # Identical embeddings stand in for near-duplicates; differing entities or polarity must still miss.
+    assert cache.get(vector, question_signature("Is bond Y green?")) is None
+    assert cache.get(vector, question_signature("Is bond X not green?")) is None
+    assert cache.get(vector, question_signature("Is the X bond green?")) == "card-x"
+
+    other = np.array([0.0, 1.0, 0.0])
+    cache.put(other, question_signature("What is the coupon?"), "card-coupon")
+    assert cache.get(vector, question_signature("Is bond X green?")) == "card-x"  # refreshes card-x
+    cache.put(np.array([0.0, 0.0, 1.0]), question_signature("Who verifies it?"), "card-spo")
+    assert cache.get(other, question_signature("What is the coupon?")) is None  # least recently used, evicted
+    assert cache.get(vector, question_signature("Is bond X green?")) == "card-x"
+
+
+def test_audit_trail_dedup_ignores_display_snippet():
+    full = AuditTrail(source_document="r.pdf", page_number=2, snippet="Solar 120 MW", display_snippet="Solar")
+    bare = AuditTrail(source_document="r.pdf", page_number=2, snippet="Solar 120 MW")
+    other_page = AuditTrail(source_document="r.pdf", page_number=3, snippet="Solar 120 MW")
+    assert full == bare and hash(full) == hash(bare)
+    assert list(dict.fromkeys([full, bare, other_page])) == [full, other_page]
+
+    mirrors = [AuditTrailDC("r.pdf", 2, "Solar 120 MW", "Solar"), AuditTrailDC("r.pdf", 2, "Solar 120 MW")]
+    assert len(dict.fromkeys(mirrors)) == 1
+
+
+def test_split_documents_fast_path_matches_splitter():
+    short = Document(page_content="  Solar park, 120 MW.\n", metadata={"source": "r.pdf", "page": 1})
+    long = Document(page_content="Wind farm output. " * 100, metadata={"source": "r.pdf", "page": 2})
+    chunks = split_documents([short, long], chunk_size=200, chunk_overlap=20)
+    assert chunks == get_splitter(200, 20).split_documents([short, long])
+    assert chunks[0].metadata is not short.metadata
+
+
+def test_vector_store_skips_chunks_already_indexed(tmp_path):
+    store = VectorStore(tmp_path / "index", embedding_model=_HashEmbedder())
+    first = [Document(page_content=f"chunk {i}", metadata={"source": "a.pdf"}) for i in range(3)]
+    assert store.add_documents(first) == 3
+
+    # Re-ingesting the same file, or a later batch overlapping an earlier one, only indexes new text.
+    again = [Document(page_content=f"chunk {i}", metadata={"source": "b.pdf"}) for i in range(2, 5)]
+    assert store.add_documents(again) == 2
+    assert store._index.ntotal == 5
+
+    reloaded = VectorStore(tmp_path / "index", embedding_model=_HashEmbedder())
+    reloaded.load_or_create([])
+    assert reloaded.add_documents([Document(page_content="chunk 0")]) == 0
+
+
+def test_bm25_is_rebuilt_once_per_new_batch(tmp_path):
+    store = VectorStore(tmp_path / "index", embedding_model=_HashEmbedder())
+    # BM25 idf is zero for a term in half the corpus, so start from three chunks.
+    store.add_documents([Document(page_content=text) for text in ("solar park output", "coupon rate 4%", "issuer")])
+    assert [doc.page_content for doc in store._bm25_search("solar", k=2)] == ["solar park output"]
+    bm25 = store._bm25
+
+    # A new batch only marks the index stale; it is rebuilt on the next search and then reused.
+    store.add_documents([Document(page_content="offshore wind farm")])
+    assert store._bm25 is bm25
+    assert [doc.page_content for doc in store._bm25_search("wind", k=2)] == ["offshore wind farm"]
+    rebuilt = store._bm25
+    assert rebuilt is not bm25
+    store._bm25_search("coupon", k=2)
+    assert store._bm25 is rebuilt
+
+
+def test_tokenizer_splits_on_non_word_characters():
+    assert VectorStore._tokenize("CO2-emissions: 12.5t, Énergie!") == ["co2", "emissions", "12", "5t", "énergie"]
+
+
+def test_search_hybrid_fuses_vector_and_keyword_ranks(tmp_path):
+    store = VectorStore(tmp_path / "index", embedding_model=_HashEmbedder())
+    texts = ["solar park output", "coupon rate", "offshore wind farm", "green building retrofit"]
+    store.add_documents([Document(page_content=text) for text in texts])
+
+    # The query equals one chunk, so that chunk ranks first in both lists and takes the full weight.
+    results = store.search_hybrid("offshore wind farm", k=2, alpha=0.6)
+    assert len(results) == 2
+    assert results[0][0].page_content == "offshore wind farm"
+    assert results[0][1] == 1.0
+    assert results[0][1] > results[1][1]
+    # A chunk found by both rankers appears once.
+    assert sorted(doc.page_content for doc, _ in store.search_hybrid("solar", k=10)) == sorted(texts)
+
+
+def _stub_engine(monkeypatch, tmp_path):
+    """RAGEngine over a one-chunk corpus whose _answer returns "card-<n>" and records each question it answers."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(rag_engine, "EmbeddingModel", lambda cache_dir: _HashEmbedder())
+    engine = RAGEngine(AppConfig(cache_dir=tmp_path), api_key="test-key")
+    engine.vector_store.load_or_create([Document(page_content="Bond X funds a solar park.")])
+    answered = []
+
+    def answer(question, query_vector):
+        answered.append(question)
+        return f"card-{len(answered)}"
+
+    monkeypatch.setattr(engine, "_answer", answer)
+    return engine, answered
+
+
+def test_engine_query_is_memoized_per_corpus_fingerprint(monkeypatch, tmp_path):
+    engine, answered = _stub_engine(monkeypatch, tmp_path)
+    assert engine.query("Is bond X green?") == "card-1"
+    assert engine.query("Is bond X green?") == "card-1"
+    assert answered == ["Is bond X green?"]
+
+    # New content changes the fingerprint, so the cached card is not served for the grown corpus.
+    engine.vector_store.add_documents([Document(page_content="Bond X solar park was cancelled.")])
+    assert engine.query("Is bond X green?") == "card-2"
+    assert len(answered) == 2
+
+
+def test_engine_exact_cache_matches_normalized_question(monkeypatch, tmp_path):
+    engine, answered = _stub_engine(monkeypatch, tmp_path)
+    engine.query("Is bond X green?")
+    embedded = []
+    monkeypatch.setattr(engine.vector_store, "embed_query", lambda question: embedded.append(question))
+
+    # Case and whitespace variants are served from the exact tier, before the question is even embedded.
+    assert engine.query("  is bond x   GREEN? ") == "card-1"
+    assert answered == ["Is bond X green?"]
+    assert embedded == []
+
+
+def test_engine_semantic_cache_serves_paraphrases_until_corpus_changes(monkeypatch, tmp_path):
+    engine, answered = _stub_engine(monkeypatch, tmp_path)
+    vector = np.ones(8, dtype=np.float32) / np.sqrt(8)
+    # Every question embeds to the same vector, standing in for paraphrases above the similarity threshold.
+    monkeypatch.setattr(engine.vector_store, "embed_query", lambda question: vector)
+
+    assert engine.query("Is bond X green?") == "card-1"
+    assert engine.query("Does bond X count as green?") == "card-1"
+    assert engine.query("Is bond X not green?") == "card-2"  # negated: must not reuse the answer
+    assert len(answered) == 2
+
+    engine.vector_store.add_documents([Document(page_content="Bond X solar park was cancelled.")])
+    assert engine.query("Does bond X count as green?") == "card-3"
+
+
+def test_load_config_is_cached_until_save(monkeypatch, tmp_path):
+    monkeypatch.setattr(config_module, "CONFIG_DIR", tmp_path)
+    monkeypatch.setattr(config_module, "CONFIG_FILE", tmp_path / "config.json")
+    try:
+        config_module.save_config(AppConfig(data_dir=tmp_path / "data", cache_dir=tmp_path / "cache"))
+        first = load_config()
+        assert load_config() is first
+
+        first.warm_queries = ["What is the coupon?"]
+        config_module.save_config(first)
+        reloaded = load_config()
+        assert reloaded is not first
+        assert reloaded.warm_queries == ["What is the coupon?"]
+        assert load_config() is reloaded
+    finally:
+        load_config.cache_clear()
+
+
+def test_chat_box_keeps_only_the_last_max_lines():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display available for Tk")
+    try:
+        box = ChatBox(root, on_send=lambda question: None, max_lines=3)
+        box.append("one")
+        box.append(["two", "three", "four"])
+        box.append("five")
+        assert box.text.get("1.0", "end-1c") == "three\nfour\nfive\n"
+    finally:
+        root.destroy()
+
+
+def test_page_text_keeps_columns_together():
+    pdf = fitz.open()
+    page = pdf.new_page()
+    # The right column starts 2pt higher than the left one; it must still follow the whole left column.
+    for text, x, y in [("LEFT-1", 50, 100), ("LEFT-2", 50, 300), ("RIGHT-1", 320, 98), ("RIGHT-2", 320, 298)]:
+        page.insert_text((x, y), text)
+    assert page_text(page).split() == ["LEFT-1", "LEFT-2", "RIGHT-1", "RIGHT-2"]
+
+
+def test_cards_cannot_be_changed_in_place():
+    card = card_from_dc(StandardizedBondInformationCardDC(alerts=("missing report",)))
+    with pytest.raises(AttributeError):
+        card.alerts.append("another")
+    with pytest.raises(AttributeError):
+        StandardizedBondInformationCard().audit_trail.append(card)
+    with pytest.raises(ValidationError):
+        card.greenwashing_score = 1.0
+    # Tuples still validate from, and serialize to, JSON arrays.
+    assert StandardizedBondInformationCard.model_validate_json('{"alerts": ["a"]}').alerts == ("a",)
+    assert card.model_dump(mode="json")["alerts"] == ["missing report"]
+
 
+def test_faiss_store_builds_quietly_and_scores_by_cosine():
+    texts = ["solar park output", "coupon rate", "offshore wind farm"]
+    embedder = _HashEmbedder()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        store = create_faiss_store(
+            [Document(page_content=text) for text in texts], embedder.embed_documents(texts), embedder, FaissSettings()
+        )
+    doc, score = store.similarity_search_with_score("coupon rate", k=1)[0]
+    assert doc.page_content == "coupon rate"
+    assert score == pytest.approx(1.0, abs=1e-5)